@@ -1,7 +1,16 @@
 """
-    Compile an AST into a list of instructions.
+    Compile an AST into a Thompson NFA.
+
+    The program is a list of instructions:
+        - Consume   consume one character accepted by a matcher
+        - Fork      continue at both of two instructions
+        - Jump      continue at another instruction
+        - Accept    the input consumed so far matches
+
+    Consume falls through to the next instruction after a character is consumed.
 """
 
+from bisect import bisect_right
 from typing import Callable
 from parsing import parser
 
@@ -12,7 +21,7 @@ class Instruction:
     pass
 
 
-class Match(Instruction):
+class Match:
     """Base class for character matchers"""
 
     def match(self, char: str) -> bool:
@@ -36,9 +45,13 @@ class Range(Match):
     def __init__(self, start: str, end: str) -> None:
         self.start = start
         self.end = end
+        self._start = ord(start)
+        self._span = ord(end) - ord(start)
 
     def match(self, char: str) -> bool:
-        return self.start <= char <= self.end
+        # Code points fit in 21 bits, so masking the difference to 21 bits
+        # turns a character below start into one larger than any span.
+        return (ord(char) - self._start) & 0x1FFFFF <= self._span
 
 
 class Any(Match):
@@ -48,6 +61,29 @@ class Any(Match):
         return True
 
 
+# Bitmap of the code points below 256.
+LATIN1: int = (1 << 256) - 1
+
+
+def latin1_bits(pred: Callable[[str], bool]) -> int:
+    """Return the bitmap of the code points below 256 that satisfy the predicate."""
+    return sum(1 << i for i in range(256) if pred(chr(i)))
+
+
+class ClassBitmap(Match):
+    """Match code points below 256 by bitmap and defer the rest to a fallback"""
+
+    def __init__(self, bits: int, fallback: Match | None = None) -> None:
+        self.bits = bits
+        self.fallback = fallback
+
+    def match(self, char: str) -> bool:
+        code = ord(char)
+        if code < 256:
+            return (self.bits >> code) & 1 == 1
+        return self.fallback is not None and self.fallback.match(char)
+
+
 class Class(Match):
     """Match a character class"""
 
@@ -59,16 +95,249 @@ class Class(Match):
         "space": str.isspace,
     }
 
+    # Membership of the first 256 code points, so they skip the call.
+    bitmaps: dict[str, int] = {
+        name: latin1_bits(pred) for name, pred in classes.items()
+    }
+
     def __init__(self, name: str) -> None:
         if name not in Class.classes:
             raise ValueError(f"Unknown class '{name}'")
         self.matcher = Class.classes[name]
+        self.bits = Class.bitmaps[name]
 
     def match(self, char: str) -> bool:
+        code = ord(char)
+        if code < 256:
+            return (self.bits >> code) & 1 == 1
         return self.matcher(char)
 
 
+class Set(Match):
+    """Match any of a list of matchers, or none of them if negated"""
+
+    def __init__(self, negated: bool, matchers: list[Match]) -> None:
+        self.negated = negated
+        self.matchers = matchers
+
+    def match(self, char: str) -> bool:
+        return any(m.match(char) for m in self.matchers) != self.negated
+
+
+class ClassMatcher(Match):
+    """Match sorted, disjoint ranges of code points by binary search"""
+
+    def __init__(self, ranges: list[tuple[int, int]]) -> None:
+        self.starts = [lo for lo, _ in ranges]
+        self.ends = [hi for _, hi in ranges]
+
+    def match(self, char: str) -> bool:
+        code = ord(char)
+        i = bisect_right(self.starts, code) - 1
+        return i >= 0 and code <= self.ends[i]
+
+
+class Bitmap(Match):
+    """Match the code points whose bits are set, counting from base"""
+
+    def __init__(self, base: int, bits: int) -> None:
+        self.base = base
+        self.bits = bits
+
+    def match(self, char: str) -> bool:
+        # A character below base masks to a shift past every set bit.
+        return (self.bits >> ((ord(char) - self.base) & 0x1FFFFF)) & 1 == 1
+
+
+# The widest span of code points matched with a Bitmap instead of a search.
+BITMAP_WIDTH: int = 256
+
+
+def ranges_matcher(ranges: list[tuple[int, int]]) -> Match:
+    """Return the cheapest matcher for a list of code point ranges.
+
+    Reversed ranges match nothing, as a lone reversed Range does, and are dropped.
+    """
+    merged: list[tuple[int, int]] = []
+    for lo, hi in sorted(ranges):
+        if lo > hi:
+            continue
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+
+    if not merged:
+        return ClassMatcher([])
+    if len(merged) == 1:
+        lo, hi = merged[0]
+        return Range(chr(lo), chr(hi))
+    base = merged[0][0]
+    if merged[-1][1] - base < BITMAP_WIDTH:
+        bits = 0
+        for lo, hi in merged:
+            bits |= ((1 << (hi - lo + 1)) - 1) << (lo - base)
+        return Bitmap(base, bits)
+    return ClassMatcher(merged)
+
+
+class Consume(Instruction):
+    """Consume a character accepted by the matcher"""
+
+    def __init__(self, matcher: Match) -> None:
+        self.matcher = matcher
+
+
+class Fork(Instruction):
+    """Continue at both targets"""
+
+    def __init__(self, first: int, second: int) -> None:
+        self.first = first
+        self.second = second
+
+
+class Jump(Instruction):
+    """Continue at the target"""
+
+    def __init__(self, target: int) -> None:
+        self.target = target
+
+
+class Accept(Instruction):
+    """The input consumed so far matches"""
+
+    pass
+
+
+def literal_prefix(ast: parser.AST) -> str:
+    """Return the literal characters every match of the expression starts with."""
+    if isinstance(ast, parser.Char):
+        return ast.char
+    prefix: list[str] = []
+    if isinstance(ast, parser.Concat):
+        for expr in ast.exprs:
+            if not isinstance(expr, parser.Char):
+                break
+            prefix.append(expr.char)
+    return "".join(prefix)
+
+
 class Compiler:
+    """Compile an AST into a list of instructions ending in a single Accept."""
+
     def __init__(self, ast: parser.AST) -> None:
         self.ast = ast
         self.instructions: list[Instruction] = []
+        self.prefix: str = literal_prefix(ast)
+        self._compile(ast)
+        self._emit(Accept())
+
+    def _emit(self, instruction: Instruction) -> int:
+        """Append an instruction and return its address."""
+        self.instructions.append(instruction)
+        return len(self.instructions) - 1
+
+    def _matcher(self, ast: parser.AST) -> Match:
+        """Return the matcher for a single character expression."""
+        if isinstance(ast, parser.Char):
+            return Char(ast.char)
+        if isinstance(ast, parser.Range):
+            return Range(ast.start, ast.end)
+        if isinstance(ast, parser.Dot):
+            return Any()
+        if isinstance(ast, parser.Class):
+            return Class(ast.name)
+        if isinstance(ast, parser.Set):
+            return ClassBitmap(self._bits(ast), self._set_matcher(ast))
+        raise ValueError(f"Not a character expression: {ast}")
+
+    def _bits(self, ast: parser.AST) -> int:
+        """Return the bitmap of code points below 256 matched by a character expression."""
+        if isinstance(ast, parser.Char):
+            code = ord(ast.char)
+            return 1 << code if code < 256 else 0
+        if isinstance(ast, parser.Range):
+            lo, hi = ord(ast.start), min(ord(ast.end), 255)
+            return ((1 << (hi - lo + 1)) - 1) << lo if lo <= hi else 0
+        if isinstance(ast, parser.Dot):
+            return LATIN1
+        if isinstance(ast, parser.Class):
+            return Class(ast.name).bits
+        if isinstance(ast, parser.Set):
+            bits = 0
+            for expr in ast.exprs:
+                bits |= self._bits(expr)
+            return bits ^ LATIN1 if ast.negated else bits
+        raise ValueError(f"Not a character expression: {ast}")
+
+    def _set_matcher(self, ast: parser.Set) -> Match:
+        """Return the matcher for a set, searching its characters and ranges together."""
+        ranges: list[tuple[int, int]] = []
+        matchers: list[Match] = []
+        pending: list[parser.AST] = list(ast.exprs)
+        while pending:
+            expr = pending.pop()
+            if isinstance(expr, parser.Char):
+                ranges.append((ord(expr.char), ord(expr.char)))
+            elif isinstance(expr, parser.Range):
+                ranges.append((ord(expr.start), ord(expr.end)))
+            elif isinstance(expr, parser.Set) and not expr.negated:
+                pending.extend(expr.exprs)
+            else:
+                matchers.append(self._matcher(expr))
+
+        if ranges:
+            matchers.append(ranges_matcher(ranges))
+        if len(matchers) == 1 and not ast.negated:
+            return matchers[0]
+        return Set(ast.negated, matchers)
+
+    def _compile(self, ast: parser.AST) -> None:
+        """Emit the instructions for an expression."""
+        if isinstance(ast, parser.Concat):
+            for expr in ast.exprs:
+                self._compile(expr)
+        elif isinstance(ast, parser.Or):
+            self._compile_or(ast)
+        elif isinstance(ast, parser.Repeat):
+            self._compile_repeat(ast)
+        else:
+            self._emit(Consume(self._matcher(ast)))
+
+    def _compile_or(self, ast: parser.Or) -> None:
+        """Emit a chain of forks, one per alternative."""
+        jumps: list[Jump] = []
+        for expr in ast.exprs[:-1]:
+            fork = Fork(len(self.instructions) + 1, -1)
+            self._emit(fork)
+            self._compile(expr)
+            jumps.append(Jump(-1))
+            self._emit(jumps[-1])
+            fork.second = len(self.instructions)
+        self._compile(ast.exprs[-1])
+        for jump in jumps:
+            jump.target = len(self.instructions)
+
+    def _compile_repeat(self, ast: parser.Repeat) -> None:
+        """Emit the mandatory copies followed by a loop or optional copies."""
+        if ast.max != -1 and ast.max < ast.min:
+            raise ValueError(f"Invalid repeat {{{ast.min},{ast.max}}}")
+
+        for _ in range(ast.min):
+            self._compile(ast.expr)
+
+        if ast.max == -1:
+            fork = Fork(len(self.instructions) + 1, -1)
+            loop = self._emit(fork)
+            self._compile(ast.expr)
+            self._emit(Jump(loop))
+            fork.second = len(self.instructions)
+            return
+
+        forks: list[Fork] = []
+        for _ in range(ast.max - ast.min):
+            forks.append(Fork(len(self.instructions) + 1, -1))
+            self._emit(forks[-1])
+            self._compile(ast.expr)
+        for fork in forks:
+            fork.second = len(self.instructions)
@@ -0,0 +1,195 @@
+"""
+    A lazily constructed DFA over a compiled NFA program.
+
+    DFA states are the epsilon-closed sets of NFA instructions that are alive
+    after consuming some input. Transitions out of a state are computed on the
+    first character that needs them and cached in a row of 256 entries indexed
+    by the character's code point, so matching text that has been seen before
+    costs a single table lookup per character. Characters above U+00FF are
+    stepped through the NFA directly.
+
+    The number of cached states is bounded; when the cache is full it is
+    cleared and states are built again as they are reached.
+
+    Search is unanchored and linear in the length of the text. A backward scan
+    finds the leftmost position at which a match starts, and an anchored
+    forward run from there finds the longest match. The backward DFA's states
+    are the sets of instructions from which the rest of the text can be matched
+    up to some end; a match starts wherever such a set meets the start state.
+    When every match starts with a known literal prefix, str.find skips the
+    text before the first occurrence of the prefix.
+"""
+
+from functools import lru_cache
+from matching.compile import (
+    Accept,
+    Compiler,
+    Consume,
+    Fork,
+    Instruction,
+    Jump,
+    Match,
+)
+from parsing.parser import parse
+
+
+State = frozenset[int]
+
+
+class LazyDFA:
+    """Match text against a program, building DFA states on demand."""
+
+    def __init__(
+        self, instructions: list[Instruction], max_states: int = 1024, prefix: str = ""
+    ) -> None:
+        self.instructions = instructions
+        self.max_states = max_states
+        self.prefix = prefix
+        self.final: int = len(instructions) - 1
+        if not isinstance(instructions[self.final], Accept):
+            raise ValueError("Program must end in an Accept instruction")
+        self.cache: dict[State, list[State | None]] = {}
+        self.start: State = self._closure([0])
+        # Each Consume instruction with the state it continues in, for the
+        # backward scan.
+        self.follow: list[tuple[int, Match, State]] = [
+            (pc, ins.matcher, self._closure([pc + 1]))
+            for pc, ins in enumerate(instructions)
+            if isinstance(ins, Consume)
+        ]
+        self.reverse_cache: dict[State, list[State | None]] = {}
+        self.reverse_start: State = frozenset([self.final])
+        self.starts: dict[State, bool] = {}
+        self.after_prefix: State = self.start
+        for char in prefix:
+            self.after_prefix = self._step(self.after_prefix, char)
+
+    def match(self, text: str, pos: int = 0) -> int | None:
+        """Return the end of the longest match starting at pos or None."""
+        return self._run(self.start, text, pos)
+
+    def search(self, text: str, pos: int = 0) -> tuple[int, int] | None:
+        """Return the span of the leftmost longest match at or after pos or None."""
+        prefix = self.prefix
+        if prefix:
+            pos = text.find(prefix, pos)
+            if pos == -1:
+                return None
+
+        start = self._leftmost_start(text, pos)
+        if start is None:
+            return None
+        end = self._run(self.after_prefix, text, start + len(prefix))
+        assert end is not None
+        return start, end
+
+    def _leftmost_start(self, text: str, pos: int) -> int | None:
+        """Return the first position at or after pos where a match starts or None."""
+        state = self.reverse_start
+        cache = self.reverse_cache
+        found = len(text) if self._starts(state) else None
+
+        for i in range(len(text) - 1, pos - 1, -1):
+            row = cache.get(state)
+            if row is None:
+                row = self._row(cache, state)
+            code = ord(text[i])
+            if code < 256:
+                nxt = row[code]
+                if nxt is None:
+                    nxt = row[code] = self._step_back(state, text[i])
+            else:
+                nxt = self._step_back(state, text[i])
+
+            state = nxt
+            if self._starts(state):
+                found = i
+        return found
+
+    def _run(self, state: State, text: str, pos: int) -> int | None:
+        """Return the end of the longest match continuing from state at pos or None."""
+        final = self.final
+        cache = self.cache
+        end = pos if final in state else None
+
+        for i in range(pos, len(text)):
+            row = cache.get(state)
+            if row is None:
+                row = self._row(cache, state)
+            code = ord(text[i])
+            if code < 256:
+                nxt = row[code]
+                if nxt is None:
+                    nxt = row[code] = self._step(state, text[i])
+            else:
+                nxt = self._step(state, text[i])
+
+            if not nxt:
+                break
+            state = nxt
+            if final in state:
+                end = i + 1
+        return end
+
+    def _row(
+        self, cache: dict[State, list[State | None]], state: State
+    ) -> list[State | None]:
+        """Allocate the transition row for a state, clearing a full cache."""
+        if len(cache) >= self.max_states:
+            cache.clear()
+            if cache is self.reverse_cache:
+                self.starts.clear()
+        row: list[State | None] = [None] * 256
+        cache[state] = row
+        return row
+
+    def _starts(self, state: State) -> bool:
+        """Return True if a match starts where the backward scan is in state."""
+        hit = self.starts.get(state)
+        if hit is None:
+            hit = self.starts[state] = not state.isdisjoint(self.start)
+        return hit
+
+    def _step_back(self, state: State, char: str) -> State:
+        """Return the backward state reached from state by consuming char."""
+        out = {self.final}
+        for pc, matcher, follow in self.follow:
+            if not follow.isdisjoint(state) and matcher.match(char):
+                out.add(pc)
+        return frozenset(out)
+
+    def _step(self, state: State, char: str) -> State:
+        """Return the state reached from state by consuming char."""
+        targets: list[int] = []
+        for pc in state:
+            ins = self.instructions[pc]
+            if isinstance(ins, Consume) and ins.matcher.match(char):
+                targets.append(pc + 1)
+        return self._closure(targets)
+
+    def _closure(self, pcs: list[int]) -> State:
+        """Return the set of Consume and Accept instructions reachable from pcs."""
+        seen: set[int] = set()
+        out: set[int] = set()
+        stack = list(reversed(pcs))
+        while stack:
+            pc = stack.pop()
+            if pc in seen:
+                continue
+            seen.add(pc)
+            ins = self.instructions[pc]
+            if isinstance(ins, Fork):
+                stack.append(ins.second)
+                stack.append(ins.first)
+            elif isinstance(ins, Jump):
+                stack.append(ins.target)
+            else:
+                out.add(pc)
+        return frozenset(out)
+
+
+@lru_cache(maxsize=1024)
+def compile_pattern(pattern: str) -> LazyDFA:
+    """Compile a regular expression, reusing the DFA of recently compiled patterns."""
+    compiler = Compiler(parse(pattern))
+    return LazyDFA(compiler.instructions, prefix=compiler.prefix)
@@ -0,0 +1,65 @@
+from parsing.parser import parse
+from matching.compile import (
+    Bitmap,
+    Class,
+    ClassBitmap,
+    ClassMatcher,
+    Compiler,
+    Range,
+    ranges_matcher,
+)
+
+
+def test_class_bitmap() -> None:
+    for name, pred in Class.classes.items():
+        matcher = Class(name)
+        for c in map(chr, range(512)):
+            assert matcher.match(c) == pred(c)
+
+
+def test_range() -> None:
+    matcher = Range("b", "d")
+    assert [matcher.match(c) for c in "abcde"] == [False, True, True, True, False]
+    assert not matcher.match("\U0010ffff")
+    assert Range("\x00", "\U0010ffff").match("\U0010ffff")
+    assert not Range("\U0010fffe", "\U0010ffff").match("\x00")
+
+
+def test_ranges_matcher() -> None:
+    chars = [chr(c) for c in range(0x400)]
+    for ranges, kind in [
+        ([(98, 98), (99, 100)], Range),
+        ([(48, 57), (97, 122), (65, 90)], Bitmap),
+        ([(48, 57), (0x3B1, 0x3C9)], ClassMatcher),
+        ([(122, 97), (98, 98)], Range),
+        ([(122, 97), (48, 57), (65, 70)], Bitmap),
+        ([(122, 97)], ClassMatcher),
+    ]:
+        matcher = ranges_matcher(ranges)
+        assert isinstance(matcher, kind)
+        for c in chars:
+            assert matcher.match(c) == any(lo <= ord(c) <= hi for lo, hi in ranges)
+
+
+def test_reversed_range_set() -> None:
+    for re, pred in [("[z-ab]", lambda c: c == "b"), ("[z-a0-9]", str.isdecimal)]:
+        matcher = Compiler(parse(re)).instructions[0].matcher
+        for c in "abz059/:":
+            assert matcher.match(c) == pred(c), (re, c)
+
+
+def test_set_bitmap() -> None:
+    chars = [chr(c) for c in range(0x400)]
+    for re, pred in [
+        ("[a-c:digit:]", lambda c: "a" <= c <= "c" or c.isdigit()),
+        ("[^xð-ā]", lambda c: c != "x" and not "ð" <= c <= "ā"),
+        ("[^[^:space:].]", lambda c: False),
+        ("[z-ab]", lambda c: c == "b"),
+        ("[z-a0-9]", lambda c: "0" <= c <= "9"),
+        ("[^z-a]", lambda c: True),
+        ("[a\U0010ffff]", lambda c: c == "a"),
+    ]:
+        matcher = Compiler(parse(re)).instructions[0].matcher
+        assert isinstance(matcher, ClassBitmap)
+        for c in chars:
+            assert matcher.match(c) == pred(c), (re, c)
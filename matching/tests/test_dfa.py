@@ -0,0 +1,92 @@
+from parsing.parser import parse
+from matching.compile import Compiler
+from matching.dfa import LazyDFA, compile_pattern
+
+
+def dfa(re: str, max_states: int = 1024) -> LazyDFA:
+    """Compile a regular expression into a lazy DFA."""
+    compiler = Compiler(parse(re))
+    return LazyDFA(compiler.instructions, max_states, compiler.prefix)
+
+
+def test_chars() -> None:
+    assert dfa("abc").match("abcd") == 3
+    assert dfa("abc").match("abd") is None
+
+
+def test_or() -> None:
+    assert dfa("ab|a").match("ab") == 2
+    assert dfa("ab|a").match("ac") == 1
+
+
+def test_repeat() -> None:
+    assert dfa("a*").match("aaab") == 3
+    assert dfa("a*").match("b") == 0
+    assert dfa("a+").match("b") is None
+    assert dfa("ab?c").match("ac") == 2
+    assert dfa("a{2,3}").match("aaaa") == 3
+    assert dfa("a{2,3}").match("ab") is None
+    assert dfa("a{2,}").match("aaaaa") == 5
+
+
+def test_set() -> None:
+    assert dfa("[a-c:digit:]+").match("ab1cd") == 4
+    assert dfa("[^a-c]").match("a") is None
+    assert dfa("[^a-c]").match("d") == 1
+
+
+def test_unicode() -> None:
+    assert dfa(".[:alpha:]").match("éλ") == 2
+
+
+def test_search() -> None:
+    assert dfa("b+").search("aabbbc") == (2, 5)
+    assert dfa("x").search("abc") is None
+    assert dfa("abcd|c").search("xabcd") == (1, 5)
+    assert dfa("a*").search("bca", 1) == (1, 1)
+    assert dfa("b").search("abab", 2) == (3, 4)
+    assert dfa("é+").search("aéé") == (1, 3)
+
+
+def test_search_brute_force() -> None:
+    for re in ["a*b", "ab|b", "(a|b)*c", "a(ba)*", "b*", "[ab]c|a"]:
+        d = dfa(re)
+        for n in range(6):
+            for i in range(3**n):
+                text = "".join("abc"[i // 3**k % 3] for k in range(n))
+                for pos in range(n + 1):
+                    expected = next(
+                        (
+                            (start, d.match(text, start))
+                            for start in range(pos, n + 1)
+                            if d.match(text, start) is not None
+                        ),
+                        None,
+                    )
+                    assert d.search(text, pos) == expected, (re, text, pos)
+
+
+def test_search_linear() -> None:
+    d = dfa("a*b")
+    assert d.search("a" * 100000) is None
+    assert d.search("a" * 100000 + "b") == (0, 100001)
+
+
+def test_search_prefix() -> None:
+    assert dfa("abc").prefix == "abc"
+    assert dfa("ab.*z").prefix == "ab"
+    assert dfa("a*b").prefix == ""
+    assert dfa("ab[0-9]+").search("ab abx ab12 ab3") == (7, 11)
+    assert dfa("ab[0-9]+").search("ab abx ab12", 8) is None
+    assert dfa("aa").search("xaaa") == (1, 3)
+
+
+def test_bounded_cache() -> None:
+    d = dfa("(a|b)*c", max_states=1)
+    assert d.match("abababc") == 7
+    assert len(d.cache) <= 1
+
+
+def test_compile_pattern() -> None:
+    assert compile_pattern("ab*") is compile_pattern("ab*")
+    assert compile_pattern("ab*").match("abbc") == 3
@@ -1,29 +1,38 @@
 """
     A simple lexer for tokenizing a regex string.
 
-    The tokens are:
-        - 'l-paren'     a left parenthesis
-        - 'r-paren'     a right parenthesis
-        - 'l-bracket'   a left bracket
-        - 'r-bracket'   a right bracket
+    The token types are:
+        - L_PAREN     a left parenthesis
+        - R_PAREN     a right parenthesis
+        - L_BRACKET   a left bracket
+        - R_BRACKET   a right bracket
         
-        - 'or'          the or operator
-        - 'star'        the star operator
-        - 'plus'        the plus operator
-        - 'question'    the question operator
-
-        - 'char'        a single character
-        - 'class'       a character class ':digit:', ':alpha:', etc.
-        - 'range'       a range of characters 'a-z'
-        - 'dot'         a dot '.'
-
-        - 'caret'       a caret '^'
+        - OR          the or operator
+        - STAR        the star operator
+        - PLUS        the plus operator
+        - QUESTION    the question operator
+        - REPEAT      a repeat operator '{n,m}'
+
+        - CHAR        a single character
+        - CLASS       a character class ':digit:', ':alpha:', etc.
+        - RANGE       a range of characters 'a-z'
+        - DOT         a dot '.'
+
+        - CARET       a caret '^'
+
+    Tokens carry up to two payload values:
+        - CHAR        v1 is the character
+        - CLASS       v1 is the class name
+        - RANGE       v1 and v2 are the first and last characters
+        - REPEAT      v1 and v2 are the minimum and maximum, either may be ''
     
 
     Characters may be escaped with a backslash '\'. 
 """
 
+import re
 from dataclasses import dataclass
+from enum import IntEnum
 from typing import Callable, Iterator
 
 
@@ -35,16 +44,60 @@ class LexerError(Exception):
         self.pos = pos
 
 
-@dataclass(frozen=True, eq=True)
+class TokenType(IntEnum):
+    """The type of a token."""
+
+    L_PAREN = 0
+    R_PAREN = 1
+    L_BRACKET = 2
+    R_BRACKET = 3
+    OR = 4
+    STAR = 5
+    PLUS = 6
+    QUESTION = 7
+    REPEAT = 8
+    CHAR = 9
+    CLASS = 10
+    RANGE = 11
+    DOT = 12
+    CARET = 13
+
+
+# Module-level aliases for the members. Looking a member up on the enum class
+# costs several times more than comparing it, so per-token code uses these.
+L_PAREN = TokenType.L_PAREN
+R_PAREN = TokenType.R_PAREN
+L_BRACKET = TokenType.L_BRACKET
+R_BRACKET = TokenType.R_BRACKET
+OR = TokenType.OR
+STAR = TokenType.STAR
+PLUS = TokenType.PLUS
+QUESTION = TokenType.QUESTION
+REPEAT = TokenType.REPEAT
+CHAR = TokenType.CHAR
+CLASS = TokenType.CLASS
+RANGE = TokenType.RANGE
+DOT = TokenType.DOT
+CARET = TokenType.CARET
+
+
+@dataclass(frozen=True, eq=True, slots=True)
 class Token:
     """A single token produced by the lexer."""
 
-    type: str
-    value: dict[str, str]
+    type: TokenType
+    v1: str | None
+    v2: str | None
     pos: int
 
     def __repr__(self) -> str:
-        return f"Token({self.type}, {self.value}, {self.pos})"
+        return f"Token({self.type.name}, {self.v1!r}, {self.v2!r}, {self.pos})"
+
+
+# Scanners for the runs of characters the lexer skips or collects.
+_WS_RE = re.compile(r"\s*")
+_DIGIT_RE = re.compile(r"\d*")
+_ALNUM_RE = re.compile(r"[^\W_]*")
 
 
 class Chars:
@@ -53,34 +106,58 @@ class Chars:
     def __init__(self, text: str) -> None:
         """Initialize the iterator at position 0 of text."""
         self.text = text
+        self.end = len(text)
         self.pos = 0
 
     def next(self) -> str | None:
         """Return the next character in the string or None if at the end."""
-        if self.pos >= len(self.text):
+        pos = self.pos
+        if pos >= self.end:
             return None
-        char = self.text[self.pos]
-        self.pos += 1
-        return char
+        self.pos = pos + 1
+        return self.text[pos]
 
     def peek(self, ahead: int = 0) -> str | None:
         """Return the next character in the string or None if at the end."""
-        if self.pos + ahead >= len(self.text):
+        pos = self.pos + ahead
+        if pos >= self.end:
             return None
-        return self.text[self.pos + ahead]
+        return self.text[pos]
 
     def next_if(self, pred: Callable[[str], bool]) -> str | None:
         """Return the next character if it satisfies the predicate or None."""
-        char = self.peek()
-        if char is not None and pred(char):
-            return self.next()
+        pos = self.pos
+        if pos < self.end and pred(char := self.text[pos]):
+            self.pos = pos + 1
+            return char
         return None
 
     def next_while(self, pred: Callable[[str], bool]) -> str:
         """Consume characters of the string while the predicate is true."""
+        text, end = self.text, self.end
+        start = pos = self.pos
+        while pos < end and pred(text[pos]):
+            pos += 1
+        self.pos = pos
+        return text[start:pos]
+
+    def skip_ws(self) -> None:
+        """Consume any whitespace at the current position."""
+        pos = self.pos
+        # Most positions are not whitespace, which is cheaper to check directly.
+        if pos < self.end and self.text[pos].isspace():
+            self.pos = _WS_RE.match(self.text, pos).end()
+
+    def next_digits(self) -> str:
+        """Consume and return a run of decimal digits."""
         start = self.pos
-        while (char := self.peek()) is not None and pred(char):
-            self.next()
+        self.pos = _DIGIT_RE.match(self.text, start).end()
+        return self.text[start : self.pos]
+
+    def next_alnum(self) -> str:
+        """Consume and return a run of alphanumeric characters."""
+        start = self.pos
+        self.pos = _ALNUM_RE.match(self.text, start).end()
         return self.text[start : self.pos]
 
     def peek_if(self, pred: Callable[[str], bool]) -> str | None:
@@ -102,17 +179,17 @@ class Chars:
 class Lexer(Iterator[Token]):
     """Iterator over the tokens of a regular expression."""
 
-    singles: dict[str, str] = {
-        "(": "l-paren",
-        ")": "r-paren",
-        "[": "l-bracket",
-        "]": "r-bracket",
-        "|": "or",
-        "*": "star",
-        "+": "plus",
-        "?": "question",
-        ".": "dot",
-        "^": "caret",
+    singles: dict[str, TokenType] = {
+        "(": TokenType.L_PAREN,
+        ")": TokenType.R_PAREN,
+        "[": TokenType.L_BRACKET,
+        "]": TokenType.R_BRACKET,
+        "|": TokenType.OR,
+        "*": TokenType.STAR,
+        "+": TokenType.PLUS,
+        "?": TokenType.QUESTION,
+        ".": TokenType.DOT,
+        "^": TokenType.CARET,
     }
 
     def __init__(self, re: str) -> None:
@@ -161,59 +238,92 @@ class Lexer(Iterator[Token]):
 
     def _next(self) -> Token | None:
         """Return the next Token or None if the end has been reached"""
-        self.chars.next_while(str.isspace)
+        self.chars.skip_ws()
 
         char = self.chars.next()
         if char is None:
             return None
 
-        if char in Lexer.singles:
-            return Token(Lexer.singles[char], {}, self.pos - 1)
-        if char == "{":
-            return self._parse_repeat()
-        if char == ":":
-            return self._parse_class()
-        if char == "\\":
-            return self._parse_escape()
+        code = ord(char)
+        if code < 128:
+            return _DISPATCH[code](self, char)
+        return self._parse_char(char)
+
+    def _parse_char(self, char: str) -> Token:
+        """Parse a character, or a range if it is followed by '-'"""
         if self.chars.peek() == "-":
             return self._parse_range(char)
-        return Token("char", {"val": char}, self.pos - 1)
+        return Token(CHAR, char, None, self.pos - 1)
 
-    def _parse_repeat(self) -> Token:
+    def _parse_repeat(self, char: str) -> Token:
         """Parse a repeat token of the form {n,m}"""
         start: int = self.pos - 1
-        min: str = self.chars.next_while(str.isdigit)
-        if not self.chars.next_if(lambda c: c == ","):
-            raise LexerError("Expected ','", self.pos)
-
-        max: str = self.chars.next_while(str.isdigit)
-        if not self.chars.next_if(lambda c: c == "}"):
-            raise LexerError("Expected '}'", self.pos)
+        min, max = scan_repeat(self.chars)
+        return Token(REPEAT, min, max, start)
 
-        return Token("repeat", {"min": min, "max": max}, start)
-
-    def _parse_class(self) -> Token:
+    def _parse_class(self, char: str) -> Token:
         """Parse a class token of the form :class:"""
         start: int = self.pos - 1
-        name: str = self.chars.next_while(lambda c: c.isalnum())
-        if not self.chars.next_if(lambda c: c == ":"):
-            raise LexerError("Expected ':'", self.pos)
-
-        return Token("class", {"val": name}, start)
+        return Token(CLASS, scan_class(self.chars), None, start)
 
-    def _parse_escape(self) -> Token:
+    def _parse_escape(self, char: str) -> Token:
         """Parse an escaped character"""
         start: int = self.pos - 1
-        char: str | None = self.chars.next()
-        if char is None:
-            raise LexerError("Expected character after '\\'", self.pos)
-        return Token("char", {"val": char}, start)
+        return Token(CHAR, scan_escape(self.chars), None, start)
 
     def _parse_range(self, first: str) -> Token:
         """Parse a range token of the form a-z"""
         start: int = self.pos - 1
-        self.chars.next()  # consume the '-'
-        last: str | None = self.chars.next()
-        if last is None:
-            raise LexerError("Expected character after '-'.", self.pos)
-        return Token("range", {"first": first, "last": last}, start)
+        return Token(RANGE, first, scan_range(self.chars), start)
+
+
+def _single(type: TokenType) -> Callable[[Lexer, str], Token]:
+    """Return a token parser for a single character operator of the given type."""
+    return lambda lexer, char: Token(type, None, None, lexer.pos - 1)
+
+
+# Token parsers for the ASCII characters, indexed by code point.
+_DISPATCH: list[Callable[[Lexer, str], Token]] = [Lexer._parse_char] * 128
+for _char, _type in Lexer.singles.items():
+    _DISPATCH[ord(_char)] = _single(_type)
+_DISPATCH[ord("{")] = Lexer._parse_repeat
+_DISPATCH[ord(":")] = Lexer._parse_class
+_DISPATCH[ord("\\")] = Lexer._parse_escape
+
+
+def scan_repeat(chars: Chars) -> tuple[str, str]:
+    """Scan the rest of a repeat after its '{' and return its minimum and maximum."""
+    min: str = chars.next_digits()
+    if not chars.next_if(lambda c: c == ","):
+        raise LexerError("Expected ','", chars.pos)
+
+    max: str = chars.next_digits()
+    if not chars.next_if(lambda c: c == "}"):
+        raise LexerError("Expected '}'", chars.pos)
+
+    return min, max
+
+
+def scan_class(chars: Chars) -> str:
+    """Scan the rest of a class after its first ':' and return its name."""
+    name: str = chars.next_alnum()
+    if not chars.next_if(lambda c: c == ":"):
+        raise LexerError("Expected ':'", chars.pos)
+    return name
+
+
+def scan_escape(chars: Chars) -> str:
+    """Scan the character after a '\\' and return it."""
+    char: str | None = chars.next()
+    if char is None:
+        raise LexerError("Expected character after '\\'", chars.pos)
+    return char
+
+
+def scan_range(chars: Chars) -> str:
+    """Scan the '-' and last character of a range and return the last character."""
+    chars.next()  # consume the '-'
+    last: str | None = chars.next()
+    if last is None:
+        raise LexerError("Expected character after '-'.", chars.pos)
+    return last
@@ -7,12 +7,15 @@
         repeat ::= atom [ 'star' | 'plus' | 'question' | 'repeat' ]
         atom ::= 'l-paren' or 'r-paren' | set | 'dot' | 'char'
         set ::= 'l-bracket' { 'char' | 'range' | 'class' | 'dot' | set } 'r-bracket'
+
+    The terminals are the tokens described in parsing.lexer, but the parser
+    scans them straight from the characters instead of going through a Lexer.
     
     These are represented by the ast nodes:
-        Or: {exprs: list[ast]}
-        Concat: {exprs: list[ast]}
+        Or: {exprs: tuple[ast, ...]}
+        Concat: {exprs: tuple[ast, ...]}
         Repeat: {expr: ast, min: int, max: int} (represents all repeat operators)
-        Set: {negated: bool, exprs: list[ast]}
+        Set: {negated: bool, exprs: tuple[ast, ...]}
         Dot: {}
         Char: {char: str}
         Range: {start: str, end: str}
@@ -20,55 +23,57 @@
 """
 
 from dataclasses import dataclass
-from parsing.lexer import Lexer
+from functools import lru_cache
+from typing import Callable, NoReturn
+from parsing.lexer import Chars, Lexer, scan_class, scan_escape, scan_range, scan_repeat
 
 
 class AST:
     """Abstract syntax tree for regular expressions."""
 
-    pass
+    __slots__ = ()
 
 
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class Or(AST):
-    exprs: list[AST]
+    exprs: tuple[AST, ...]
 
 
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class Concat(AST):
-    exprs: list[AST]
+    exprs: tuple[AST, ...]
 
 
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class Repeat(AST):
     expr: AST
     min: int
     max: int  # -1 means infinity
 
 
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class Set(AST):
     negated: bool
-    exprs: list[AST]
+    exprs: tuple[AST, ...]
 
 
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class Dot(AST):
     pass
 
 
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class Char(AST):
     char: str
 
 
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class Range(AST):
     start: str
     end: str
 
 
-@dataclass(frozen=True, eq=True)
+@dataclass(frozen=True, eq=True, slots=True)
 class Class(AST):
     name: str
 
@@ -82,98 +87,167 @@ class ParserError(Exception):
 
 
 
-def _set(lexer: Lexer) -> AST:
+# Characters that cannot start an atom.
+_OPERATORS: str = ")]|*+?^{:"
+
+# Characters that cannot be members of a set.
+_SET_OPERATORS: str = "()|*+?^{"
+
+
+def _skip(chars: Chars) -> str | None:
+    """Skip whitespace and return the next character without consuming it."""
+    chars.skip_ws()
+    pos = chars.pos
+    return chars.text[pos] if pos < chars.end else None
+
+
+def _finish_token(chars: Chars, char: str) -> None:
+    """Scan the rest of the token starting with the consumed char, as the Lexer would."""
+    if char == "{":
+        scan_repeat(chars)
+    elif char == ":":
+        scan_class(chars)
+    elif char == "\\":
+        scan_escape(chars)
+    elif char not in Lexer.singles and chars.peek() == "-":
+        scan_range(chars)
+
+
+def _reject(chars: Chars, char: str, msg: str) -> NoReturn:
+    """Raise a ParserError at the token starting with the consumed char.
+
+    The token and the one after it are scanned first, so a malformed token
+    raises the LexerError that the Lexer's one token lookahead would have.
+    """
+    _finish_token(chars, char)
+    if (char := _skip(chars)) is not None:
+        chars.pos += 1
+        _finish_token(chars, char)
+    raise ParserError(msg, chars.pos)
+
+
+def _set_char(chars: Chars, char: str) -> AST:
+    """Parse a character or a range in a set."""
+    if char in _SET_OPERATORS:
+        _reject(chars, char, f"Unexpected '{char}'")
+    if chars.peek() == "-":
+        return Range(char, scan_range(chars))
+    return Char(char)
+
+
+# Parsers for the members of a set that do not start with a plain character.
+_SET_MEMBERS: dict[str, Callable[[Chars, str], AST]] = {
+    "\\": lambda chars, char: Char(scan_escape(chars)),
+    ":": lambda chars, char: Class(scan_class(chars)),
+    ".": lambda chars, char: Dot(),
+    "[": lambda chars, char: _set(chars),
+}
+
+
+def _set(chars: Chars) -> AST:
     """Parse a set expression."""
     negated: bool = False
-    if (tok := lexer.peek()) and tok.type == "caret":
-        lexer.next()
+    if _skip(chars) == "^":
+        chars.pos += 1
         negated: bool = True
     
     exprs: list[AST] = []
-    while (tok := lexer.next()) and tok.type != "r-bracket":
-        if tok.type == "char":
-            exprs.append(Char(tok.value["val"]))
-        elif tok.type == "range":
-            exprs.append(Range(tok.value["first"], tok.value["last"]))
-        elif tok.type == "class":
-            exprs.append(Class(tok.value["val"]))
-        elif tok.type == "dot":
-            exprs.append(Dot())
-        elif tok.type == "l-bracket":
-            exprs.append(_set(lexer))
-        else:
-            raise ParserError(f"Unexpected token {tok.type}", lexer.pos)
-    return Set(negated, exprs)
-
-
-def _atom(lexer: Lexer) -> AST:
-    """Parse an atom."""
-    tok = lexer.next()
-    if not tok:
-        raise ParserError("Unexpected end of input", lexer.pos)
+    append, member = exprs.append, _SET_MEMBERS.get
+    while (char := _skip(chars)) is not None:
+        chars.pos += 1
+        if char == "]":
+            break
+        append(member(char, _set_char)(chars, char))
+    return Set(negated, tuple(exprs))
+
 
-    if tok.type == "char":
-        return Char(tok.value["val"])
-    if tok.type == "dot":
+def _atom(chars: Chars) -> AST:
+    """Parse an atom."""
+    char = _skip(chars)
+    if char is None:
+        raise ParserError("Unexpected end of input", chars.pos)
+    chars.pos += 1
+
+    if char == "\\":
+        return Char(scan_escape(chars))
+    if char == ".":
         return Dot()
-    if tok.type == "l-paren":
-        expr = _or(lexer)
-        if not (tok := lexer.next()) or tok.type != "r-paren":
-            raise ParserError("Expected ')'", lexer.pos)
+    if char == "(":
+        expr = _or(chars)
+        if (char := _skip(chars)) != ")":
+            if char is None:
+                raise ParserError("Expected ')'", chars.pos)
+            chars.pos += 1
+            _reject(chars, char, "Expected ')'")
+        chars.pos += 1
         return expr
-    if tok.type == "l-bracket":
-        return _set(lexer)
-    else:
-        raise ParserError(f"Unexpected token {tok.type}", lexer.pos)
+    if char == "[":
+        return _set(chars)
+    if char in _OPERATORS:
+        _reject(chars, char, f"Unexpected '{char}'")
+    if chars.peek() == "-":
+        _reject(chars, char, "Unexpected range")
+    return Char(char)
 
 
-def _repeat(lexer: Lexer) -> AST:
+def _repeat(chars: Chars) -> AST:
     """Parse a repeat expression."""
-    expr = _atom(lexer)
-    tok = lexer.peek()
-    if tok and tok.type == "star":
-        lexer.next()
+    expr = _atom(chars)
+    char = _skip(chars)
+    if char == "*":
+        chars.pos += 1
         return Repeat(expr, 0, -1)
-    elif tok and tok.type == "plus":
-        lexer.next()
+    elif char == "+":
+        chars.pos += 1
         return Repeat(expr, 1, -1)
-    elif tok and tok.type == "question":
-        lexer.next()
+    elif char == "?":
+        chars.pos += 1
         return Repeat(expr, 0, 1)
-    elif tok and tok.type == "repeat":
-        lexer.next()
-        min = int(tok.value["min"]) if tok.value["min"] else 0
-        max = int(tok.value["max"]) if tok.value["max"] else -1
-        return Repeat(expr, min, max)
+    elif char == "{":
+        chars.pos += 1
+        min, max = scan_repeat(chars)
+        return Repeat(expr, int(min) if min else 0, int(max) if max else -1)
     return expr
 
 
-def _concat(lexer: Lexer) -> AST:
+def _splice(exprs: list[AST], expr: AST, kind: type[Concat] | type[Or]) -> None:
+    """Append expr to exprs, inlining its children if it is of the same kind."""
+    if isinstance(expr, kind):
+        exprs.extend(expr.exprs)
+    else:
+        exprs.append(expr)
+
+
+def _concat(chars: Chars) -> AST:
     """Parse a concat expression."""
-    exprs = [_repeat(lexer)]
-    while (tok := lexer.peek()) and tok.type not in ("or", "r-paren"):
-        exprs.append(_repeat(lexer))
+    exprs: list[AST] = []
+    _splice(exprs, _repeat(chars), Concat)
+    while (char := _skip(chars)) is not None and char != "|" and char != ")":
+        _splice(exprs, _repeat(chars), Concat)
     if len(exprs) == 1:
         return exprs[0]
-    return Concat(exprs)
+    return Concat(tuple(exprs))
 
 
-def _or(lexer: Lexer) -> AST:
+def _or(chars: Chars) -> AST:
     """Parse an or expression."""
-    exprs = [_concat(lexer)]
-    while (tok := lexer.peek()) and tok.type == "or":
-        lexer.next()
-        exprs.append(_concat(lexer))
+    exprs: list[AST] = []
+    _splice(exprs, _concat(chars), Or)
+    while _skip(chars) == "|":
+        chars.pos += 1
+        _splice(exprs, _concat(chars), Or)
 
     if len(exprs) == 1:
         return exprs[0]
-    return Or(exprs)
+    return Or(tuple(exprs))
 
 
+@lru_cache(maxsize=1024)
 def parse(text: str) -> AST:
-    """Parse a regular expression."""
-    lexer = Lexer(text)
-    expr = _or(lexer)
-    if lexer.peek():
-        raise ParserError(f"Unexpected token {lexer.next()}", lexer.pos)
+    """Parse a regular expression, reusing the AST of recently parsed patterns."""
+    chars = Chars(text)
+    expr = _or(chars)
+    if (char := _skip(chars)) is not None:
+        chars.pos += 1
+        _reject(chars, char, f"Unexpected '{char}'")
     return expr
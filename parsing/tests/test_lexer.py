@@ -1,46 +1,52 @@
-from parsing.lexer import Token, Lexer
+from parsing.lexer import Token, TokenType, Lexer
 
 
-def has_types(tokens: list[Token], types: list[str]) -> None:
+def has_types(tokens: list[Token], types: list[TokenType]) -> None:
     """Check whether the tokens have the correct types."""
     assert types == [t.type for t in tokens]
 
 
-def has_values(tokens: list[Token], values: list[dict[str, str]]) -> None:
+def has_values(tokens: list[Token], values: list[tuple[str | None, str | None]]) -> None:
     """Check whether the tokens have the correct values."""
-    assert values == [t.value for t in tokens]
+    assert values == [(t.v1, t.v2) for t in tokens]
 
 
 def test_chars() -> None:
     tokens = list(Lexer("abc"))
-    has_types(tokens, ["char", "char", "char"])
-    has_values(tokens, [{"val": "a"}, {"val": "b"}, {"val": "c"}])
+    has_types(tokens, [TokenType.CHAR, TokenType.CHAR, TokenType.CHAR])
+    has_values(tokens, [("a", None), ("b", None), ("c", None)])
 
 
 def test_range() -> None:
     tokens = list(Lexer("aa-b"))
-    has_types(tokens, ["char", "range"])
-    has_values(tokens, [{"val": "a"}, {"first": "a", "last": "b"}])
+    has_types(tokens, [TokenType.CHAR, TokenType.RANGE])
+    has_values(tokens, [("a", None), ("a", "b")])
 
 
 def test_repeat() -> None:
     tokens = list(Lexer("a{1,2}"))
-    has_types(tokens, ["char", "repeat"])
-    has_values(tokens, [{"val": "a"}, {"min": "1", "max": "2"}])
+    has_types(tokens, [TokenType.CHAR, TokenType.REPEAT])
+    has_values(tokens, [("a", None), ("1", "2")])
 
 
 def test_class() -> None:
     tokens = list(Lexer(":alnum:"))
-    has_types(tokens, ["class"])
-    has_values(tokens, [{"val": "alnum"}])
+    has_types(tokens, [TokenType.CLASS])
+    has_values(tokens, [("alnum", None)])
 
 
 def test_escaped() -> None:
     tokens = list(Lexer(r"\|"))
-    has_types(tokens, ["char"])
-    has_values(tokens, [{"val": "|"}])
+    has_types(tokens, [TokenType.CHAR])
+    has_values(tokens, [("|", None)])
 
 def test_parens() -> None:
     tokens = list(Lexer("(a)"))
-    has_types(tokens, ["l-paren", "char", "r-paren"])
-    has_values(tokens, [{}, {"val": "a"}, {}])
+    has_types(tokens, [TokenType.L_PAREN, TokenType.CHAR, TokenType.R_PAREN])
+    has_values(tokens, [(None, None), ("a", None), (None, None)])
+
+
+def test_whitespace() -> None:
+    tokens = list(Lexer(" a \t{1,2}\n :alpha:"))
+    has_types(tokens, [TokenType.CHAR, TokenType.REPEAT, TokenType.CLASS])
+    has_values(tokens, [("a", None), ("1", "2"), ("alpha", None)])
@@ -1,26 +1,22 @@
+import pytest
+from parsing.lexer import LexerError
 from parsing.parser import *
 
 
 def types(ast: AST) -> list[type[AST]]:
-    """Recursively walk the AST and return the types of each node in pre-order."""
-    if isinstance(ast, Or):
-        return [Or] + sum((types(expr) for expr in ast.exprs), [])
-    elif isinstance(ast, Concat):
-        return [Concat] + sum((types(expr) for expr in ast.exprs), [])
-    elif isinstance(ast, Repeat):
-        return [Repeat] + types(ast.expr)
-    elif isinstance(ast, Set):
-        return [Set] + sum((types(expr) for expr in ast.exprs), [])
-    elif isinstance(ast, Dot):
-        return [Dot]
-    elif isinstance(ast, Char):
-        return [Char]
-    elif isinstance(ast, Range):
-        return [Range]
-    elif isinstance(ast, Class):
-        return [Class]
-    else:
-        raise ValueError(f"Unknown AST node: {ast}")
+    """Walk the AST and return the types of each node in pre-order."""
+    out: list[type[AST]] = []
+    stack: list[AST] = [ast]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, (Or, Concat, Repeat, Set, Dot, Char, Range, Class)):
+            raise ValueError(f"Unknown AST node: {node}")
+        out.append(type(node))
+        if isinstance(node, (Or, Concat, Set)):
+            stack.extend(reversed(node.exprs))
+        elif isinstance(node, Repeat):
+            stack.append(node.expr)
+    return out
 
 
 def test_or():
@@ -56,3 +52,24 @@ def test_set():
 def test_neg_set():
     ast = parse("[^.]")
     assert types(ast) == [Set, Dot]
+
+
+def test_error_types():
+    for re in ["{", "x*:", ".:", "a} :(", "a):", "(a b{"]:
+        with pytest.raises(LexerError):
+            parse(re)
+    for re in ["*", "a)", "(a", "a-b", "[a|]"]:
+        with pytest.raises(ParserError):
+            parse(re)
+
+
+def test_hashable():
+    ast = parse("(a|[b-c])*")
+    assert hash(ast) == hash(Repeat(Or((Char("a"), Set(False, (Range("b", "c"),)))), 0, -1))
+    assert not hasattr(ast, "__dict__")
+
+
+def test_flatten():
+    assert parse("(ab)(c(d))") == Concat((Char("a"), Char("b"), Char("c"), Char("d")))
+    assert parse("(a|b)|c") == Or((Char("a"), Char("b"), Char("c")))
+    assert types(parse("(a|b)c")) == [Concat, Or, Char, Char, Char]